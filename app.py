@@ -1,11 +1,96 @@
 # app.py
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_from_directory
+import io
+import itertools
+import mimetypes
 import os
+import re
 import sys
 import subprocess
 import time
 from threading import Thread
 import json
+from urllib.parse import quote
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+from batcher import MicroBatcher
+from cache import TranslationCache, cached_translation
+
+def load_nlp():
+    """Load the spaCy pipeline; only the tokenizer and tagger are needed"""
+    import spacy
+    return spacy.load("en_core_web_sm", disable=["parser", "ner", "lemmatizer"])
+
+try:
+    # Load one pipeline at import so it is shared by every processor
+    NLP = load_nlp()
+except (ImportError, OSError) as e:
+    NLP = None
+    print(f"Warning: Could not load spaCy pipeline: {e}")
+
+def ensure_nltk_data(resources):
+    """Download missing NLTK resources, serialised across processes by a file lock"""
+    import nltk
+    
+    def missing():
+        names = []
+        for path, name in resources:
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                names.append(name)
+        return names
+    
+    if not missing():
+        return
+    
+    import fasteners
+    download_dir = nltk.data.path[0]
+    os.makedirs(download_dir, exist_ok=True)
+    with fasteners.InterProcessLock(os.path.join(download_dir, '.dl.lock')):
+        # Another worker may have finished the download while we waited
+        for name in missing():
+            nltk.download(name, download_dir=download_dir, quiet=True)
+
+# Request threads per worker process (gunicorn gthread 'threads', see
+# gunicorn.conf.py); this bounds how many ISL requests can be batched together
+REQUEST_THREADS = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Seconds a request waits for the ISL micro-batcher before giving up
+ISL_BATCH_TIMEOUT = 30
+
+# Fused tokenize + alphanumeric filter in a single C-level pass; matches runs of
+# Unicode alphanumerics, i.e. the same characters str.isalnum() accepts
+_WORD_RE = re.compile(r"[^\W_]+")
+
+def pretokenized_words(tokens):
+    """Apply the same word filter as _WORD_RE tokenization to caller-supplied tokens"""
+    return [word for token in tokens for word in _WORD_RE.findall(token)]
+
+# Penn Treebank tag -> SOV bucket (0: subject, 1: object, 2: verb, 3: other),
+# precomputed so bucketing is one dict lookup per token instead of prefix checks
+PTB_TAGS = [
+    'CC', 'CD', 'DT', 'EX', 'FW', 'IN', 'JJ', 'JJR', 'JJS', 'LS', 'MD',
+    'NN', 'NNS', 'NNP', 'NNPS', 'PDT', 'POS', 'PRP', 'PRP$', 'RB', 'RBR',
+    'RBS', 'RP', 'SYM', 'TO', 'UH', 'VB', 'VBD', 'VBG', 'VBN', 'VBP', 'VBZ',
+    'WDT', 'WP', 'WP$', 'WRB',
+]
+BUCKET = {
+    tag: 0 if tag.startswith('PRP') else 1 if tag.startswith('NN') else 2 if tag.startswith('VB') else 3
+    for tag in PTB_TAGS
+}
+
+# NLTK fallback: load the tagger once instead of on every call
+_TAGGER = None
+if NLP is None:
+    try:
+        from nltk.tag.perceptron import PerceptronTagger
+        ensure_nltk_data([
+            ('taggers/averaged_perceptron_tagger', 'averaged_perceptron_tagger'),
+        ])
+        _TAGGER = PerceptronTagger()
+    except Exception as e:
+        print(f"Warning: Could not load NLTK tagger: {e}")
 
 # Add the ISL repo to path
 sys.path.append('text_to_isl')
@@ -18,22 +103,63 @@ except ImportError:
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'static/videos'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['CACHE_FOLDER'] = 'cache'
+app.config['MAX_CONTENT_LENGTH'] = 256 * 1024  # 256KB max JSON body
+app.config['MAX_TEXT_LENGTH'] = 64 * 1024  # max characters per text field
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+def _reset_video_seq():
+    """(Re)seed the per-process video id counter; prefixed by pid so forked workers never collide"""
+    global _VIDEO_PREFIX, _VIDEO_SEQ
+    _VIDEO_PREFIX = f"{os.getpid():x}"
+    _VIDEO_SEQ = itertools.count(int(time.time()) * 1000)
+
+_reset_video_seq()
+os.register_at_fork(after_in_child=_reset_video_seq)
+
+def next_video_id():
+    """Unique id for a generated video file without a clock read per request"""
+    return f"{_VIDEO_PREFIX}_{next(_VIDEO_SEQ):x}"
+
+# Let a fronting web server stream video files instead of Flask:
+# X-Sendfile for Apache/lighttpd, X-Accel-Redirect (internal location prefix) for nginx
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+app.config['X_ACCEL_REDIRECT_PREFIX'] = os.environ.get('X_ACCEL_REDIRECT_PREFIX', '')
+
+def write_placeholder(video_path, label, tokens):
+    """Write the text placeholder for a video, assembled in memory and written once"""
+    buf = io.BytesIO()
+    buf.write(label.encode('utf-8'))
+    buf.write(b" Signs: ")
+    buf.write(" -> ".join(tokens).encode('utf-8'))
+    data = memoryview(buf.getvalue())
+    
+    fd = os.open(video_path.replace('.mp4', '.txt'), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        # os.write may write fewer bytes than requested; keep going until done
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+    finally:
+        os.close(fd)
+
+# Translation results cache (in-memory LRU in front of SQLite)
+translation_cache = TranslationCache(app.config['CACHE_FOLDER'])
+
 class SignLanguageTranslator:
     def __init__(self):
         self.isl_processor = ISLProcessor()
         self.asl_processor = ASLProcessor()
     
-    def translate(self, text, language='isl'):
+    @cached_translation(translation_cache)
+    def translate(self, text, language='isl', tokens=None):
         """Main translation function"""
         if language.lower() == 'isl':
-            return self.isl_processor.translate(text)
+            return self.isl_processor.translate(text, tokens)
         elif language.lower() == 'asl':
-            return self.asl_processor.translate(text)
+            return self.asl_processor.translate(text, tokens)
         else:
             raise ValueError("Unsupported language. Use 'isl' or 'asl'")
 
@@ -45,24 +171,19 @@ class ISLProcessor:
     
     def setup_isl_environment(self):
         """Setup ISL processing environment"""
-        try:
-            # Download required models if not present
-            import stanza
-            import nltk
-            
-            # Download required NLTK data
-            nltk.download('punkt', quiet=True)
-            nltk.download('averaged_perceptron_tagger', quiet=True)
-            nltk.download('wordnet', quiet=True)
-            
-        except Exception as e:
-            print(f"Warning: Could not setup ISL environment: {e}")
+        # Share the module-level pipeline instead of loading one per processor
+        self.nlp = NLP
+        
+        # Concurrent requests are tagged together in one nlp.pipe call. The
+        # batcher's worker thread is the only caller of self.nlp, so the pipeline
+        # is never run by two threads at once.
+        self.batcher = MicroBatcher(self.isl_batch, max_batch_size=REQUEST_THREADS, max_wait=0.005)
     
-    def translate(self, text):
+    def translate(self, text, tokens=None):
         """Translate text to ISL"""
         try:
             # Use the ISL repository's main processing function
-            result = self.process_text_to_isl(text)
+            result = self.process_text_to_isl(text, tokens)
             return {
                 'success': True,
                 'video_path': result.get('video_path'),
@@ -75,23 +196,18 @@ class ISLProcessor:
                 'error': str(e)
             }
     
-    def process_text_to_isl(self, text):
+    def process_text_to_isl(self, text, tokens=None):
         """Process text using ISL repository logic"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        # Tokenization and preprocessing
-        tokens = self.tokenize_text(text)
-        
-        # POS tagging
-        pos_tags = self.pos_tag(tokens)
-        
-        # Convert to ISL grammar structure
-        isl_tokens = self.convert_to_isl_structure(tokens, pos_tags)
+        # Tokenization, POS tagging and conversion to ISL grammar structure in
+        # a single pass (tokenization is skipped when the caller supplies tokens)
+        isl_tokens = self.text_to_isl_tokens(text, tokens)
         
         # Generate video
         video_path = self.generate_isl_video(isl_tokens)
         
-        processing_time = time.time() - start_time
+        processing_time = time.perf_counter() - start_time
         
         return {
             'video_path': video_path,
@@ -99,46 +215,72 @@ class ISLProcessor:
             'processing_time': processing_time
         }
     
+    def text_to_isl_tokens(self, text, tokens=None):
+        """Tokenize (unless pretokenized), POS tag and reorder input into ISL tokens"""
+        if tokens is not None:
+            # Same word filter as the text path; also drops empty strings spaCy rejects
+            tokens = pretokenized_words(token.lower() for token in tokens)
+        if self.nlp is None:
+            if tokens is None:
+                tokens = self.tokenize_text(text)
+            return self.convert_to_isl_structure(self.pos_tag(tokens))
+        future = self.batcher.submit(text if tokens is None else tokens)
+        return future.result(timeout=ISL_BATCH_TIMEOUT)
+    
+    def isl_batch(self, items):
+        """Convert a batch of texts or filtered, lowercased word lists to ISL tokens in one spaCy pass"""
+        from spacy.tokens import Doc
+        results = [None] * len(items)
+        inputs = []
+        positions = []
+        for i, item in enumerate(items):
+            try:
+                if isinstance(item, list):
+                    inputs.append(Doc(self.nlp.vocab, words=item))
+                else:
+                    inputs.append(item.lower())
+                positions.append(i)
+            except Exception as e:
+                # Bad client input fails only its own request, not the whole batch
+                results[i] = e
+        
+        docs = self.nlp.pipe(inputs, batch_size=max(len(inputs), 1))
+        for i, doc in zip(positions, docs):
+            results[i] = self.convert_to_isl_structure(
+                (token.text, token.tag_) for token in doc if token.text.isalnum()
+            )
+        return results
+    
     def tokenize_text(self, text):
-        """Tokenize input text"""
-        import nltk
-        tokens = nltk.word_tokenize(text.lower())
-        return [token for token in tokens if token.isalnum()]
+        """Tokenize input text (NLTK fallback)"""
+        return _WORD_RE.findall(text.lower())
     
     def pos_tag(self, tokens):
-        """POS tagging"""
-        import nltk
-        return nltk.pos_tag(tokens)
+        """POS tagging (NLTK fallback)"""
+        if _TAGGER is None:
+            raise RuntimeError("No POS tagger available; install spaCy or NLTK data")
+        return _TAGGER.tag(tokens)
     
-    def convert_to_isl_structure(self, tokens, pos_tags):
+    def convert_to_isl_structure(self, pos_tags):
         """Convert English structure to ISL structure (SOV)"""
         # Basic ISL grammar conversion
         # This is a simplified version - the actual repo has more complex rules
         
-        subjects = []
-        objects = []
-        verbs = []
-        others = []
-        
+        # Single pass over the tagged tokens, uppercasing each once into its bucket:
+        # subjects (pronouns), objects (nouns), verbs, everything else
+        buckets = ([], [], [], [])
         for token, pos in pos_tags:
-            if pos.startswith('PRP'):  # Pronouns (subjects)
-                subjects.append(token.upper())
-            elif pos.startswith('NN'):  # Nouns (can be objects)
-                objects.append(token.upper())
-            elif pos.startswith('VB'):  # Verbs
-                verbs.append(token.upper())
-            else:
-                others.append(token.upper())
+            buckets[BUCKET.get(pos, 3)].append(token.upper())
         
         # ISL follows SOV structure
-        isl_structure = subjects + objects + verbs + others
+        isl_structure = buckets[0] + buckets[1] + buckets[2] + buckets[3]
         return isl_structure
     
     def generate_isl_video(self, isl_tokens):
         """Generate ISL video from tokens"""
         # This would use the actual video generation logic from the repo
         # For demo purposes, return a placeholder
-        video_filename = f"isl_{int(time.time())}.mp4"
+        video_filename = f"isl_{next_video_id()}.mp4"
         video_path = os.path.join(app.config['UPLOAD_FOLDER'], video_filename)
         
         # Simulate video generation
@@ -150,8 +292,7 @@ class ISLProcessor:
         """Create a placeholder video (replace with actual ISL video generation)"""
         # This is where the actual SIGML to video conversion would happen
         # For now, create a simple text-based representation
-        with open(video_path.replace('.mp4', '.txt'), 'w') as f:
-            f.write(f"ISL Signs: {' -> '.join(tokens)}")
+        write_placeholder(video_path, "ISL", tokens)
 
 class ASLProcessor:
     """ASL translation processor"""
@@ -163,10 +304,10 @@ class ASLProcessor:
         """Setup ASL processing environment"""
         pass
     
-    def translate(self, text):
+    def translate(self, text, tokens=None):
         """Translate text to ASL"""
         try:
-            result = self.process_text_to_asl(text)
+            result = self.process_text_to_asl(text, tokens)
             return {
                 'success': True,
                 'video_path': result.get('video_path'),
@@ -179,18 +320,20 @@ class ASLProcessor:
                 'error': str(e)
             }
     
-    def process_text_to_asl(self, text):
+    def process_text_to_asl(self, text, tokens=None):
         """Process text to ASL"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Basic ASL processing
-        tokens = text.lower().split()
-        asl_tokens = [token.upper() for token in tokens if token.isalnum()]
+        if tokens is None:
+            asl_tokens = [token.upper() for token in _WORD_RE.findall(text)]
+        else:
+            asl_tokens = [token.upper() for token in pretokenized_words(tokens)]
         
         # Generate ASL video
         video_path = self.generate_asl_video(asl_tokens)
         
-        processing_time = time.time() - start_time
+        processing_time = time.perf_counter() - start_time
         
         return {
             'video_path': video_path,
@@ -200,12 +343,11 @@ class ASLProcessor:
     
     def generate_asl_video(self, asl_tokens):
         """Generate ASL video from tokens"""
-        video_filename = f"asl_{int(time.time())}.mp4"
+        video_filename = f"asl_{next_video_id()}.mp4"
         video_path = os.path.join(app.config['UPLOAD_FOLDER'], video_filename)
         
         # Create placeholder for ASL video
-        with open(video_path.replace('.mp4', '.txt'), 'w') as f:
-            f.write(f"ASL Signs: {' -> '.join(asl_tokens)}")
+        write_placeholder(video_path, "ASL", asl_tokens)
         
         return video_filename
 
@@ -219,20 +361,41 @@ def index():
 
 @app.route('/translate', methods=['POST'])
 def translate_text():
-    """Handle translation requests"""
+    """Handle translation requests
+    
+    JSON body: {"text": str, "language": "isl" | "asl"}. Batch callers with
+    already tokenized input may send {"tokens": [str, ...]} instead of (or in
+    addition to) "text" to skip tokenization.
+    """
     data = request.get_json()
     
-    if not data or 'text' not in data:
+    if not data or ('text' not in data and 'tokens' not in data):
         return jsonify({'error': 'No text provided'}), 400
     
-    text = data['text'].strip()
+    tokens = data.get('tokens')
+    if tokens is not None:
+        if not isinstance(tokens, list) or not all(isinstance(t, str) for t in tokens):
+            return jsonify({'error': 'tokens must be a list of strings'}), 400
+        joined_tokens = ' '.join(tokens)
+        if len(joined_tokens) > app.config['MAX_TEXT_LENGTH']:
+            return jsonify({'error': 'Tokens too long'}), 413
+        text = data.get('text') or joined_tokens
+    else:
+        text = data['text']
+    
+    text = text.strip()
     language = data.get('language', 'isl').lower()
     
     if not text:
         return jsonify({'error': 'Empty text provided'}), 400
     
+    if len(text) > app.config['MAX_TEXT_LENGTH']:
+        return jsonify({'error': 'Text too long'}), 413
+    
     try:
-        result = translator.translate(text, language)
+        # Runs on the request thread: gthread workers provide request concurrency
+        # and ISL tagging is already handed off to the micro-batcher
+        result = translator.translate(text, language, tokens)
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -240,11 +403,25 @@ def translate_text():
 @app.route('/video/<filename>')
 def serve_video(filename):
     """Serve generated videos"""
-    video_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    if os.path.exists(video_path):
-        return send_file(video_path)
-    else:
+    accel_prefix = app.config['X_ACCEL_REDIRECT_PREFIX']
+    try:
+        if accel_prefix:
+            video_path = safe_join(app.config['UPLOAD_FOLDER'], filename)
+            if video_path is None or not os.path.isfile(video_path):
+                raise NotFound()
+            # nginx keeps the upstream Content-Type on an internal redirect
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = app.response_class(mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(filename)
+        else:
+            # Rejects paths escaping UPLOAD_FOLDER; sendfile(2) is used where available
+            response = send_from_directory(app.config['UPLOAD_FOLDER'], filename, conditional=True)
+    except NotFound:
         return "Video not found", 404
+    
+    # Filenames are unique per generation, so clients may cache them indefinitely
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
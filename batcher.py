@@ -0,0 +1,81 @@
+# batcher.py
+import os
+import queue
+import time
+from concurrent.futures import Future
+from threading import Thread, Lock
+
+class MicroBatcher:
+    """Collect concurrent requests into small batches processed by one worker thread"""
+    
+    def __init__(self, process_batch, max_batch_size=16, max_wait=0.005):
+        # process_batch takes a list of items and returns a list of results in order;
+        # an exception instance in the results fails only that item's future
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = None
+        self._worker_pid = None
+        self._lock = Lock()
+    
+    def submit(self, item):
+        """Queue an item and return a Future resolved with its result"""
+        future = Future()
+        self._ensure_worker().put((item, future))
+        return future
+    
+    def _ensure_worker(self):
+        """Start the worker lazily, once per process (threads do not survive fork)"""
+        pid = os.getpid()
+        if self._worker_pid != pid:
+            with self._lock:
+                if self._worker_pid != pid:
+                    self._queue = queue.Queue()
+                    Thread(target=self._run, args=(self._queue,), daemon=True).start()
+                    self._worker_pid = pid
+        return self._queue
+    
+    def _run(self, pending):
+        """Drain the queue, flushing when the batch is full or the window elapses"""
+        while True:
+            batch = [pending.get()]
+            # Only hold the batch open when other requests are already waiting,
+            # so a lone request is processed immediately
+            if not pending.empty():
+                deadline = time.monotonic() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(pending.get(timeout=timeout))
+                    except queue.Empty:
+                        break
+            
+            try:
+                self._process(batch)
+            except BaseException as e:
+                # Keep the worker alive: a dead worker would hang every later request
+                error = e
+            else:
+                error = None
+            
+            # Whatever happened, never leave a caller waiting on an unresolved future
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error or RuntimeError('Batch produced no result'))
+    
+    def _process(self, batch):
+        """Run one batch and resolve its futures with per-item results or exceptions"""
+        results = self.process_batch([item for item, _ in batch])
+        if len(results) != len(batch):
+            raise RuntimeError(
+                f'process_batch returned {len(results)} results for {len(batch)} items'
+            )
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
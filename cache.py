@@ -1,57 +1,146 @@
 # cache.py
-import pickle
 import os
 import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
 from functools import wraps
 import time
 
+try:
+    # SIMD-accelerated, non-cryptographic use only; falls back to MD5 if missing
+    from blake3 import blake3 as _key_hash
+except ImportError:
+    _key_hash = hashlib.md5
+
+try:
+    # Results are JSON-shaped dicts; orjson is much faster than pickle for them
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    import json
+    _dumps = lambda obj: json.dumps(obj).encode('utf-8')
+    _loads = json.loads
+
+# Entries are valid for 24 hours; timestamps are integer nanoseconds
+CACHE_TTL_NS = 86400 * 10**9
+
 class TranslationCache:
-    def __init__(self, cache_dir='cache'):
+    def __init__(self, cache_dir='cache', mem_capacity=1024):
         self.cache_dir = cache_dir
         os.makedirs(cache_dir, exist_ok=True)
+        
+        # In-memory LRU in front of the disk store, keyed by (text, language).
+        # It holds decoded results; hits return a shallow copy so callers can't
+        # mutate the cached dict.
+        self._mem = OrderedDict()
+        self._mem_cap = mem_capacity
+        self._mem_lock = threading.Lock()
+        
+        # Single SQLite KV store (WAL mode) instead of one pickle file per key.
+        # The connection is opened lazily per process, since SQLite connections
+        # must not be shared across fork() (e.g. gunicorn preload_app).
+        self.db_path = os.path.join(cache_dir, 'translations.db')
+        self.conn = None
+        self._conn_pid = None
+        self._lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+    
+    def _connect(self):
+        """Return this process's SQLite connection, opening it on first use"""
+        pid = os.getpid()
+        if self._conn_pid != pid:
+            with self._connect_lock:
+                if self._conn_pid != pid:
+                    conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    conn.execute('PRAGMA synchronous=NORMAL')
+                    conn.execute(
+                        'CREATE TABLE IF NOT EXISTS translations ('
+                        'key BLOB PRIMARY KEY, timestamp INTEGER NOT NULL, payload BLOB NOT NULL'
+                        ') WITHOUT ROWID'
+                    )
+                    conn.commit()
+                    self._lock = threading.Lock()
+                    self.conn = conn
+                    self._conn_pid = pid
+        return self.conn
     
     def get_cache_key(self, text, language):
         """Generate cache key for text and language combination"""
-        content = f"{text}_{language}".encode('utf-8')
-        return hashlib.md5(content).hexdigest()
+        # Feed the parts incrementally rather than building f"{text}_{language}"
+        h = _key_hash()
+        h.update(text.encode('utf-8'))
+        h.update(b'_')
+        h.update(language.encode('utf-8'))
+        return h.digest()[:16]
     
     def get(self, text, language):
         """Get cached translation if available"""
+        mem_key = (text, language)
+        with self._mem_lock:
+            entry = self._mem.get(mem_key)
+            if entry is not None:
+                # Check if cache is still valid (24 hours)
+                if time.time_ns() - entry[0] < CACHE_TTL_NS:
+                    self._mem.move_to_end(mem_key)
+                    return dict(entry[1])
+                del self._mem[mem_key]
+        
         cache_key = self.get_cache_key(text, language)
-        cache_file = os.path.join(self.cache_dir, f"{cache_key}.pkl")
         
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'rb') as f:
-                    cached_data = pickle.load(f)
-                    # Check if cache is still valid (24 hours)
-                    if time.time() - cached_data['timestamp'] < 86400:
-                        return cached_data['result']
-            except Exception:
-                pass
+        try:
+            conn = self._connect()
+            with self._lock:
+                row = conn.execute(
+                    'SELECT timestamp, payload FROM translations WHERE key = ?',
+                    (cache_key,)
+                ).fetchone()
+            # Check if cache is still valid (24 hours)
+            if row is not None and time.time_ns() - row[0] < CACHE_TTL_NS:
+                result = _loads(row[1])
+                self._remember(mem_key, row[0], result)
+                return dict(result)
+        except Exception:
+            pass
         return None
     
     def set(self, text, language, result):
         """Cache translation result"""
         cache_key = self.get_cache_key(text, language)
-        cache_file = os.path.join(self.cache_dir, f"{cache_key}.pkl")
-        
-        cache_data = {
-            'result': result,
-            'timestamp': time.time()
-        }
+        timestamp = time.time_ns()
         
         try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump(cache_data, f)
+            self._remember((text, language), timestamp, dict(result))
+            payload = _dumps(result)
+            conn = self._connect()
+            with self._lock, conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO translations (key, timestamp, payload) '
+                    'VALUES (?, ?, ?)',
+                    (cache_key, timestamp, payload)
+                )
         except Exception:
             pass
+    
+    def _remember(self, mem_key, timestamp, result):
+        """Insert into the in-memory LRU, evicting the oldest entry when full"""
+        with self._mem_lock:
+            self._mem[mem_key] = (timestamp, result)
+            self._mem.move_to_end(mem_key)
+            if len(self._mem) > self._mem_cap:
+                self._mem.popitem(last=False)
 
 def cached_translation(cache_instance):
     """Decorator for caching translations"""
     def decorator(func):
         @wraps(func)
-        def wrapper(self, text, language='isl'):
+        def wrapper(self, text, language='isl', tokens=None):
+            # Pretokenized requests are keyed by more than the text; don't cache them
+            if tokens is not None:
+                return func(self, text, language, tokens)
+            
             # Check cache first
             cached_result = cache_instance.get(text, language)
             if cached_result:
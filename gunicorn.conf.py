@@ -0,0 +1,16 @@
+# gunicorn.conf.py
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+
+# Threaded workers so each process serves concurrent requests; this is what
+# feeds the translation thread pool and the ISL micro-batcher in app.py
+worker_class = 'gthread'
+# (app.py sizes its ISL batches from the same GUNICORN_THREADS value)
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Import app.py (and load the NLP models) once in the master before forking,
+# so workers share the model memory copy-on-write instead of each loading it
+preload_app = True
@@ -23,16 +23,15 @@ def setup_directories():
 def download_models():
     """Download required models"""
     import nltk
-    import stanza
+    import spacy.cli
     
-    # Download NLTK data
-    nltk.download('punkt')
-    nltk.download('averaged_perceptron_tagger')
-    nltk.download('wordnet')
-    nltk.download('stopwords')
+    # Only tokenization and coarse POS tags are needed for the SOV reordering,
+    # so a small spaCy model (with the NLTK perceptron tagger as fallback) is a
+    # deliberate speed/size tradeoff over a neural pipeline such as Stanza
+    spacy.cli.download('en_core_web_sm')
     
-    # Download Stanza models
-    stanza.download('en')
+    # Download NLTK data for the fallback tagger
+    nltk.download('averaged_perceptron_tagger')
 
 def clone_isl_repo():
     """Clone the ISL repository if not present"""
@@ -0,0 +1,47 @@
+# test_app.py
+import pytest
+
+spacy = pytest.importorskip("spacy")
+if not spacy.util.is_package("en_core_web_sm"):
+    pytest.skip("spaCy model 'en_core_web_sm' is not installed", allow_module_level=True)
+
+import app as app_module
+
+
+@pytest.fixture
+def client():
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+def test_translate_isl_spacy_path(client):
+    assert app_module.translator.isl_processor.nlp is not None
+    
+    response = client.post('/translate', json={'text': 'I like apples', 'language': 'isl'})
+    result = response.get_json()
+    
+    assert response.status_code == 200
+    assert result['success'], result
+    # SOV order: subject, object, verb
+    assert result['isl_gloss'] == 'I APPLES LIKE'
+
+
+def test_translate_asl_keeps_non_ascii_words(client):
+    response = client.post('/translate', json={'text': 'café naïve', 'language': 'asl'})
+    result = response.get_json()
+    
+    assert result['success'], result
+    assert result['asl_gloss'] == 'CAFÉ NAÏVE'
+
+
+def test_translate_isl_pretokenized_filters_tokens(client):
+    response = client.post('/translate', json={
+        'tokens': ['', 'I', 'like', 'apples,'],
+        'language': 'isl'
+    })
+    result = response.get_json()
+    
+    assert response.status_code == 200
+    assert result['success'], result
+    assert result['isl_gloss'] == 'I APPLES LIKE'